@@ -1,12 +1,21 @@
+import copy
+import itertools
+import json
+import random
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 from json.decoder import JSONDecodeError
-from logging import Logger
+from logging import Logger, DEBUG
 from os import environ
-from typing import Optional, Sequence, Dict, Union, cast, Iterator, Iterable, List, Literal
+from typing import Any, Optional, Sequence, Dict, Union, cast, Iterator, Iterable, List, Literal, TypeVar, Tuple, \
+    Callable, Deque, MutableMapping
 
 import requests
-from api_session import APISession, escape_path, JSONDict
-from requests.exceptions import HTTPError
+from api_session import APISession, JSONDict, escape_path as _escape_path
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError, JSONDecodeError as RequestsJSONDecodeError
 
 from magento.exceptions import MagentoException, MagentoAssertionError
 from magento.queries import Query, make_search_query, make_field_value_query
@@ -14,6 +23,11 @@ from magento.types import Product, SourceItem, Sku, Category, MediaEntry, Magent
     SourceItemIn, BasePrice
 from magento.version import __version__
 
+try:
+    import orjson  # type: ignore[import-not-found, unused-ignore]
+except ImportError:  # pragma: nocover
+    orjson = None  # type: ignore[assignment, unused-ignore]
+
 __all__ = (
     "Magento",
 )
@@ -55,15 +69,182 @@ DEFAULT_ATTRIBUTE_DICT = {
 
 DEFAULT_SCOPE = "all"
 
+T = TypeVar("T")
+
+_cached_escape_path = lru_cache(maxsize=4096, typed=True)(_escape_path)
+
+
+def escape_path(x: Any, *, safe="") -> str:
+    """Escape some value for inclusion in a URL path.
+
+    This is equivalent to ``api_session.escape_path``, but skips the escaping of integers and alphanumeric ASCII strings,
+    and caches the result for other hashable values since the same SKUs are often escaped over and over.
+    """
+    if isinstance(x, int):
+        return str(x)
+    if isinstance(x, str) and x.isascii() and x.isalnum():
+        return x
+    try:
+        return _cached_escape_path(x, safe=safe)
+    except TypeError:  # unhashable value
+        return _escape_path(x, safe=safe)
+
+
+def _chunks(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Yield successive lists of at most ``size`` elements from an iterable."""
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _first(iterable: Iterable[T]) -> Optional[T]:
+    """Return the first element of an iterable, or ``None`` if it's empty. The iterator is closed afterward if it's a
+    generator, so that it doesn't wait for the garbage collector to be finalized.
+    """
+    iterator = iter(iterable)
+    try:
+        return next(iterator, None)
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+
+
+def _last_page(first_page: JSONDict, *, page_size: int, limit: int) -> int:
+    """Compute the number of the last page to fetch for a search query, given its first page."""
+    total_count: int = first_page.get("total_count") or 0
+    if limit > 0:
+        total_count = min(total_count, limit)
+
+    # The server may cap the page size below the requested one: use the actual size of the first page in that case.
+    # If total_count is too large instead, get_paginated stops when Magento returns the last page again.
+    first_page_count = len(first_page.get("items") or ())
+    if 0 < first_page_count < min(page_size, total_count):
+        page_size = first_page_count
+
+    return (total_count + page_size - 1) // page_size
+
+
+def _get_pages(get_page: Callable[[int], JSONDict], *, page_size: int, limit: int) -> Iterator[JSONDict]:
+    """Yield the pages of a search query in order.
+
+    The last page is computed from the total count of items given in the first page. Magento returns the last page
+    again when asked for a page past the end, so requesting more pages would only yield duplicated items.
+    """
+    first_page = get_page(1)
+    yield first_page
+
+    for page in range(2, _last_page(first_page, page_size=page_size, limit=limit) + 1):
+        yield get_page(page)
+
+
+def _get_pages_concurrently(get_page: Callable[[int], JSONDict], *, max_workers: int, page_size: int,
+                            limit: int) -> Iterator[JSONDict]:
+    """Yield the pages of a search query in order, fetching up to ``max_workers`` pages concurrently.
+
+    The first page is fetched alone to know the total count of items, then the following pages are fetched with a
+    sliding window of ``max_workers`` concurrent requests, so that at most that many pages are held in memory.
+    """
+    first_page = get_page(1)
+    yield first_page
+
+    pages = iter(range(2, _last_page(first_page, page_size=page_size, limit=limit) + 1))
+    futures: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for page in itertools.islice(pages, max_workers):
+                futures.append(executor.submit(get_page, page))
+
+            while futures:
+                res = futures.popleft().result()
+                next_page = next(pages, None)
+                if next_page is not None:
+                    futures.append(executor.submit(get_page, next_page))
+                yield res
+        finally:
+            # Don't fetch pages that won't be used if the caller stopped the iteration early
+            for future in futures:
+                future.cancel()
+
+
+def _bulk_payload(payload: JSONDict, async_bulk: bool) -> Union[JSONDict, List[JSONDict]]:
+    """Wrap a request payload in a list if it's sent to the async bulk API, which takes a list of payloads."""
+    if async_bulk:
+        return [payload]
+    return payload
+
+
+def _order_status_payload(order: Order, status: str, external_order_id: Optional[str] = None) -> Order:
+    """Build the payload to save an order with a new status."""
+    payload = {
+        "entity_id": order["entity_id"],
+        "status": status,
+        "increment_id": order["increment_id"],  # we need to repeat increment_id, otherwise it is regenerated
+    }
+    if external_order_id is not None:
+        payload["ext_order_id"] = external_order_id
+
+    return payload
+
+
+@lru_cache(maxsize=64)
+def _rest_path_prefix(scope: str, async_bulk: bool) -> str:
+    """Return the prefix of the REST API paths for a scope: ``"/rest/<scope>"``, or ``"/rest"`` for the ``"default"``
+    scope, followed by ``"/async/bulk"`` for the async bulk API. This is cached because the scope rarely changes.
+    """
+    prefix = "/rest"
+    if scope != "default":
+        prefix += f"/{scope}"
+    if async_bulk:
+        prefix += "/async/bulk"
+    return prefix
+
+
+def _join_fields(fields: Union[str, Sequence[str]]) -> str:
+    """Format fields for the ``fields`` parameter: ``["sku", "name"]`` -> ``"sku,name"``."""
+    if isinstance(fields, str):
+        return fields
+    return ",".join(fields)
+
+
+def _items_fields(fields: Union[str, Sequence[str], None]) -> Optional[str]:
+    """Wrap the fields to retrieve for each item of a search query in the ``fields`` parameter format."""
+    if fields is None:
+        return None
+    return f"items[{_join_fields(fields)}],total_count"
+
+
+def _loads_json(content: bytes):
+    """Parse a JSON payload. This uses ``orjson`` if it's installed, and the standard ``json`` module otherwise."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _dumps_json(payload) -> bytes:
+    """Serialize a payload to JSON bytes with ``orjson``. This must be called only if ``orjson`` is installed."""
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _response_json(response: requests.Response):
+    """Equivalent of ``response.json()`` that parses the raw bytes of the body with ``_loads_json``.
+    Like ``response.json()``, this raises ``requests.exceptions.JSONDecodeError`` if the body is not valid JSON.
+    """
+    try:
+        return _loads_json(response.content)
+    except JSONDecodeError as e:  # orjson.JSONDecodeError is a subclass of json.JSONDecodeError
+        raise RequestsJSONDecodeError(e.msg, e.doc, e.pos)
+
 
 def raise_for_response(response: requests.Response):
     """Equivalent of `requests.Response#raise_for_status` with some Magento specifics."""
     if response.ok:
         return
 
-    if response.text and response.text[0] == "{":
+    # Look at the raw bytes rather than response.text to avoid decoding large non-JSON (e.g. HTML) error pages
+    if response.content[:1] == b"{":
         try:
-            body = response.json()
+            body = _response_json(response)
         except (ValueError, JSONDecodeError):
             pass
         else:
@@ -79,13 +260,29 @@ def raise_for_response(response: requests.Response):
 
 
 class Magento(APISession):
-    """Client for the Magento API."""
+    """Client for the Magento API.
+
+    The client is a ``requests.Session``: connections are kept alive and reused between calls, so it should be created
+    once and reused rather than instantiated for each call. It can be used as a context manager to close its
+    connections when it's no longer needed:
+
+        >>> with Magento() as client:
+        ...     client.get_product("SKU123")
+    """
     PAGE_SIZE = 1000
     """
     Default batch size for paginated requests.
     Note Magento supports hard limits on this:
       https://developer.adobe.com/commerce/webapi/get-started/api-security/
     """
+    RETRY_DELAY = 1.0
+    """
+    Delay in seconds before the first retry of a failed request. It's doubled for each subsequent retry, up to
+    ``RETRY_MAX_DELAY``, and a random jitter of up to ``RETRY_DELAY`` seconds is added.
+    """
+    RETRY_MAX_DELAY = 60.0
+    """Maximum delay in seconds between two retries of a failed request, not including the jitter. This also caps the
+    delay given by ``Retry-After`` headers."""
 
     def __init__(self,
                  token: Optional[str] = None,
@@ -96,6 +293,9 @@ class Magento(APISession):
                  user_agent=None,
                  *,
                  batch_page_size: Optional[int] = None,
+                 pool_maxsize: Optional[int] = None,
+                 cache_ttl: Optional[float] = None,
+                 cache: Optional[MutableMapping[str, Tuple[float, Any]]] = None,
                  **kwargs):
         """Create a Magento client instance. All arguments are optional and fall back on environment variables named
         ``PYMAGENTO_ + argument.upper()`` (``PYMAGENTO_TOKEN``, ``PYMAGENTO_BASE_URL``, etc.).
@@ -106,6 +306,12 @@ class Magento(APISession):
         :param scope: API scope. Default on ``PYMAGENTO_SCOPE`` if set, or ``"all"``. Note this scope is mostly useless,
             see https://github.com/magento/magento2/issues/15461#issuecomment-1157935732.
         :param batch_page_size: if set, override the default page size used for batch queries.
+        :param pool_maxsize: if set, mount an ``HTTPAdapter`` that keeps up to that many connections alive. This is
+            only useful if the client is used from multiple threads at once.
+        :param cache_ttl: if set, cache the responses of endpoints that return rarely changing data, such as product
+            types, for that many seconds. See ``get_cached_json_api``. By default, nothing is cached.
+        :param cache: mapping where cached responses are stored when ``cache_ttl`` is set. Default is an in-memory
+            ``dict``. Pass a persistent mapping such as ``shelve.open(path)`` to keep the cache between runs.
         :param logger: optional logger.
         :param read_only: if True, raise on calls that write data, such as `POST`, `PUT`, `DELETE`.
         :param user_agent: User-Agent
@@ -122,11 +328,19 @@ class Magento(APISession):
 
         super().__init__(base_url=base_url, user_agent=user_agent, read_only=read_only, **kwargs)
 
+        if pool_maxsize is not None:
+            adapter = HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=kwargs.get("max_retries") or 0)
+            self.mount("https://", adapter)
+            # noinspection HttpUrlsUsage
+            self.mount("http://", adapter)
+
         if batch_page_size is not None:
             self.PAGE_SIZE = batch_page_size
 
         self.scope = scope
         self.logger = logger
+        self.cache_ttl = cache_ttl
+        self._cache: MutableMapping[str, Tuple[float, Any]] = cache if cache is not None else {}
         self.headers["Authorization"] = f"Bearer {token}"
 
     # Addresses
@@ -152,9 +366,7 @@ class Magento(APISession):
     def save_attribute(self, attribute: MagentoEntity, *, with_defaults=True, **kwargs) -> MagentoEntity:
         """Save an attribute."""
         if with_defaults:
-            base = DEFAULT_ATTRIBUTE_DICT.copy()
-            base.update(attribute)
-            attribute = base
+            attribute = {**DEFAULT_ATTRIBUTE_DICT, **attribute}
 
         return self.post_json_api("/V1/products/attributes", json={"attribute": attribute}, **kwargs)
 
@@ -171,8 +383,8 @@ class Magento(APISession):
 
     def get_attribute_set_attributes(self, attribute_set_id: int, **kwargs):
         """Get all attributes for the given attribute set id."""
-        return self.get_json_api(f"/V1/products/attribute-sets/{escape_path(attribute_set_id)}/attributes",
-                                 **kwargs)
+        return self.get_cached_json_api(f"/V1/products/attribute-sets/{escape_path(attribute_set_id)}/attributes",
+                                        **kwargs)
 
     def assign_attribute_set_attribute(self, attribute_set_id: int, attribute_group_id: int, attribute_code: str,
                                        sort_order: int = 0, **kwargs):
@@ -185,17 +397,21 @@ class Magento(APISession):
         :param kwargs:
         :return:
         """
-        return self.post_json_api("/V1/products/attribute-sets/attributes", json={
+        ret = self.post_json_api("/V1/products/attribute-sets/attributes", json={
             "attributeCode": attribute_code,
             "attributeGroupId": attribute_group_id,
             "attributeSetId": attribute_set_id,
             "sortOrder": sort_order,
         }, **kwargs)
+        self._invalidate_cache(f"/V1/products/attribute-sets/{escape_path(attribute_set_id)}/attributes")
+        return ret
 
     def remove_attribute_set_attribute(self, attribute_set_id: int, attribute_code: str, **kwargs):
         """Remove an attribute from an attribute set."""
-        path = f"/V1/products/attribute-sets/{escape_path(attribute_set_id)}/attributes/{escape_path(attribute_code)}"
-        return self.delete_json_api(path, **kwargs)
+        path = f"/V1/products/attribute-sets/{escape_path(attribute_set_id)}/attributes"
+        ret = self.delete_json_api(f"{path}/{escape_path(attribute_code)}", **kwargs)
+        self._invalidate_cache(path)
+        return ret
 
     # Bulk Operations
     # ===============
@@ -217,7 +433,7 @@ class Magento(APISession):
 
     def get_bulk_operation_status_count(self, bulk_uuid: str, status: int, **kwargs) -> int:
         """Get operations count by bulk UUID and status."""
-        return self.get_json_api(f"/V1/bulk/{escape_path(bulk_uuid)}/operation-status/{status}", **kwargs)
+        return self.get_json_api(f"/V1/bulk/{escape_path(bulk_uuid)}/operation-status/{escape_path(status)}", **kwargs)
 
     # Carts
     # =====
@@ -258,7 +474,7 @@ class Magento(APISession):
 
     def get_category(self, category_id: PathId, **kwargs) -> Optional[Category]:
         """Return a category given its id."""
-        return self.get_json_api(f"/V1/categories/{category_id}", **kwargs)
+        return self.get_json_api(f"/V1/categories/{escape_path(category_id)}", **kwargs)
 
     def get_category_by_name(self, name: str, *, assert_one=False, **kwargs) -> Optional[Category]:
         """Return the first category with the given name.
@@ -267,16 +483,13 @@ class Magento(APISession):
         :param assert_one: if True, assert that either none or exactly one category matches this name
         :return:
         """
-        limit = 2 if assert_one else 1
-        categories = list(self.get_categories(make_field_value_query("name", name), limit=limit, **kwargs))
-
-        if categories:
-            if assert_one:
-                assert len(categories) == 1, "There should not be more than one category with the name %s" % repr(name)
-
-            return categories[0]
+        query = make_field_value_query("name", name)
+        if not assert_one:
+            return _first(self.get_categories(query, limit=1, **kwargs))
 
-        return None
+        categories = list(self.get_categories(query, limit=2, **kwargs))
+        assert len(categories) <= 1, "There should not be more than one category with the name %s" % repr(name)
+        return categories[0] if categories else None
 
     def update_category(self, category_id: PathId, category_data: Category, **kwargs) -> Category:
         """Update a category.
@@ -522,10 +735,7 @@ class Magento(APISession):
 
     def get_invoice_by_increment_id(self, increment_id: str) -> Optional[MagentoEntity]:
         """Get an invoice by increment ID."""
-        query = make_field_value_query("increment_id", increment_id)
-        for invoice in self.get_invoices(query=query, limit=1):
-            return invoice
-        return None
+        return self.get_first_by_field("/V1/invoices", "increment_id", increment_id)
 
     def get_invoices(self, query: Query = None, limit=-1, **kwargs) -> Iterator[MagentoEntity]:
         """Get all invoices (generator)."""
@@ -597,17 +807,14 @@ class Magento(APISession):
                   none_on_empty=False,
                   **kwargs) -> Order:
         """Get an order given its entity id."""
-        return self.get_json_api(f"/V1/orders/{order_id}",
+        return self.get_json_api(f"/V1/orders/{escape_path(order_id)}",
                                  none_on_404=none_on_404,
                                  none_on_empty=none_on_empty,
                                  **kwargs)
 
     def get_order_by_increment_id(self, increment_id: str, **kwargs) -> Optional[Order]:
         """Get an order given its increment id. Return ``None`` if the order doesn’t exist."""
-        query = make_field_value_query("increment_id", increment_id)
-        for order in self.get_orders(query=query, limit=1, **kwargs):
-            return order
-        return None
+        return self.get_first_by_field("/V1/orders", "increment_id", increment_id, **kwargs)
 
     def hold_order(self, order_id: Union[str, int], **kwargs):
         """Hold an order. This is the opposite of ``unhold_order``.
@@ -638,15 +845,48 @@ class Magento(APISession):
         :param external_order_id: optional external order id
         :return:
         """
-        payload = {
-            "entity_id": order["entity_id"],
-            "status": status,
-            "increment_id": order["increment_id"],  # we need to repeat increment_id, otherwise it is regenerated
-        }
-        if external_order_id is not None:
-            payload["ext_order_id"] = external_order_id
+        return self.save_order(_order_status_payload(order, status, external_order_id), **kwargs)
+
+    def async_hold_orders(self, order_ids: Iterable[Union[str, int]], **kwargs) -> MagentoEntity:
+        """Hold multiple orders using the async bulk API. This is the bulk equivalent of ``hold_order``.
+
+        See https://developer.adobe.com/commerce/webapi/rest/use-rest/asynchronous-web-endpoints/
+
+        :param order_ids: order ids (not increment ids)
+        :return: the bulk response, with the ``bulk_uuid`` to use with ``get_bulk_status``.
+        """
+        payload = [{"id": order_id} for order_id in order_ids]
+        return self.post_json_api("/V1/orders/byId/hold", json=payload, async_bulk=True, **kwargs)
 
-        return self.save_order(payload, **kwargs)
+    def async_unhold_orders(self, order_ids: Iterable[Union[str, int]], **kwargs) -> MagentoEntity:
+        """Un-hold multiple orders using the async bulk API. This is the bulk equivalent of ``unhold_order``.
+
+        :param order_ids: order ids (not increment ids)
+        :return: the bulk response, with the ``bulk_uuid`` to use with ``get_bulk_status``.
+        """
+        payload = [{"id": order_id} for order_id in order_ids]
+        return self.post_json_api("/V1/orders/byId/unhold", json=payload, async_bulk=True, **kwargs)
+
+    def async_save_orders(self, orders: Iterable[Order], **kwargs) -> MagentoEntity:
+        """Save multiple orders using the async bulk API. This is the bulk equivalent of ``save_order``.
+
+        :param orders: order payloads
+        :return: the bulk response, with the ``bulk_uuid`` to use with ``get_bulk_status``.
+        """
+        payload = [{"entity": order} for order in orders]
+        return self.post_json_api("/V1/orders", json=payload, async_bulk=True, **kwargs)
+
+    def async_set_order_statuses(self, statuses: Iterable[Tuple[Order, str]], **kwargs) -> MagentoEntity:
+        """Change the status of multiple orders using the async bulk API. This is the bulk equivalent of
+        ``set_order_status``, with the same caveats.
+
+        Example:
+            >>> Magento().async_set_order_statuses([(order1, "processing"), (order2, "complete")])
+
+        :param statuses: iterable of (order, new status) tuples
+        :return: the bulk response, with the ``bulk_uuid`` to use with ``get_bulk_status``.
+        """
+        return self.async_save_orders((_order_status_payload(order, status) for order, status in statuses), **kwargs)
 
     # Credit Memos
     # ============
@@ -658,6 +898,22 @@ class Magento(APISession):
     # Prices
     # ======
 
+    def get_prices(self, skus: Sequence[Sku], *, store_id: Union[int, None] = None,
+                   **kwargs) -> Tuple[List[BasePrice], List[MagentoEntity]]:
+        """Get both the base prices and the special prices for a sequence of SKUs.
+        This is equivalent to ``(get_base_prices(skus), get_special_prices(skus))``, but both requests are made
+        concurrently.
+
+        :param skus:
+        :param store_id: Filter by store ID.
+        :param kwargs: keyword arguments passed to both underlying calls.
+        :return: a tuple of (base prices, special prices)
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            base_prices = executor.submit(self.get_base_prices, skus, store_id=store_id, **kwargs)
+            special_prices = executor.submit(self.get_special_prices, skus, store_id=store_id, **kwargs)
+            return base_prices.result(), special_prices.result()
+
     # Base Prices
     # -----------
 
@@ -731,11 +987,22 @@ class Magento(APISession):
         """Delete a sequence of special prices."""
         return self.post_json_api("/V1/products/special-price-delete", json={"prices": special_prices}, **kwargs)
 
-    def delete_special_prices_by_sku(self, skus: Sequence[Sku], *, store_id: Union[int, None] = None,
-                                     **kwargs):
-        """Equivalent of ``delete_special_prices(get_special_prices(skus))``."""
-        special_prices = self.get_special_prices(skus, store_id=store_id, **kwargs)
-        return self.delete_special_prices(special_prices, **kwargs)
+    def delete_special_prices_by_sku(self, skus: Iterable[Sku], *, store_id: Union[int, None] = None,
+                                     batch_size=200, **kwargs) -> List[JSONDict]:
+        """Equivalent of ``delete_special_prices(get_special_prices(skus))``, but done in batches of SKUs so that
+        the special prices of all SKUs are never loaded at once.
+
+        :param skus:
+        :param store_id: Filter by store ID.
+        :param batch_size: number of SKUs to process at a time.
+        :return: a list of errors (if any)
+        """
+        errors: List[JSONDict] = []
+        for skus_batch in _chunks(skus, batch_size):
+            special_prices = self.get_special_prices(skus_batch, store_id=store_id, **kwargs)
+            if special_prices:
+                errors.extend(self.delete_special_prices(special_prices, **kwargs))
+        return errors
 
     # Products
     # ========
@@ -753,7 +1020,7 @@ class Magento(APISession):
 
     def get_products_types(self, **kwargs) -> Sequence[MagentoEntity]:
         """Get available product types."""
-        return self.get_json_api("/V1/product/types", **kwargs)
+        return self.get_cached_json_api("/V1/product/types", **kwargs)
 
     def get_product(self, sku: Sku, *,
                     none_on_404=True,
@@ -775,10 +1042,7 @@ class Magento(APISession):
         :param product_id: ID of the product
         :return:
         """
-        query = make_field_value_query("entity_id", product_id)
-        for product in self.get_products(query=query, limit=1, **kwargs):
-            return product
-        return None
+        return self.get_first_by_field("/V1/products/", "entity_id", product_id, **kwargs)
 
     def get_product_by_query(self, query: Query, *, expect_one=True, **kwargs) -> Optional[Product]:
         """Get a product with a custom query. Return ``None`` if the query doesn’t return match any product, and raise
@@ -789,15 +1053,12 @@ class Magento(APISession):
         :return:
         """
         if not expect_one:
-            for product in self.get_products(query=query, limit=1, **kwargs):
-                return product
-            return None
+            return _first(self.get_products(query=query, limit=1, **kwargs))
 
-        products = list(self.get_products(query=query, limit=2, **kwargs))
-        if not products:
-            return None
-        if len(products) == 1:
-            return products[0]
+        products = self.get_products(query=query, limit=2, **kwargs)
+        product = next(products, None)
+        if product is None or next(products, None) is None:
+            return product
         raise MagentoAssertionError("Got more than one product for query %r" % query)
 
     def get_product_medias(self, sku: Sku, **kwargs) -> Sequence[MediaEntry]:
@@ -815,7 +1076,7 @@ class Magento(APISession):
         :param media_id:
         :return:
         """
-        return self.get_json_api(f"/V1/products/{escape_path(sku)}/media/{media_id}", **kwargs)
+        return self.get_json_api(f"/V1/products/{escape_path(sku)}/media/{escape_path(media_id)}", **kwargs)
 
     def save_product_media(self, sku: Sku, media_entry: MediaEntry, **kwargs):
         """Save a product media."""
@@ -828,7 +1089,7 @@ class Magento(APISession):
         :param media_id:
         :return:
         """
-        return self.delete_json_api(f"/V1/products/{escape_path(sku)}/media/{media_id}", **kwargs)
+        return self.delete_json_api(f"/V1/products/{escape_path(sku)}/media/{escape_path(media_id)}", **kwargs)
 
     def save_product(self, product: Product, *, save_options: Optional[bool] = None, log_response=True,
                      **kwargs) -> Product:
@@ -845,10 +1106,10 @@ class Magento(APISession):
 
         # throw=False so the log is printed before we raise
         resp = self.post_api("/V1/products", json=payload, throw=False, **kwargs)
-        if log_response and self.logger:
-            self.logger.debug("Save product response: %s" % resp.text)
+        if log_response and self.logger and self.logger.isEnabledFor(DEBUG):
+            self.logger.debug("Save product response: %s", resp.text)
         raise_for_response(resp)
-        return cast(Product, resp.json())
+        return cast(Product, _response_json(resp))
 
     def update_product(self, sku: Sku, product: Product, *, save_options: Optional[bool] = None, **kwargs) -> Product:
         """Update a product.
@@ -889,7 +1150,7 @@ class Magento(APISession):
 
         # "Will returned True if deleted"
         # https://magento.redoc.ly/2.3.6-admin/tag/productssku#operation/catalogProductRepositoryV1DeleteByIdDelete
-        return cast(bool, response.json())
+        return cast(bool, _response_json(response))
 
     def async_update_products(self, product_updates: Iterable[Product], **kwargs):
         """Update multiple products using the async bulk API.
@@ -922,7 +1183,7 @@ class Magento(APISession):
         :param stock_item:
         :return: the stock item ID
         """
-        return self.put_json_api(f"/V1/products/{escape_path(sku)}/stockItems/{stock_item_id}", json={
+        return self.put_json_api(f"/V1/products/{escape_path(sku)}/stockItems/{escape_path(stock_item_id)}", json={
             "stockItem": stock_item,
         }, **kwargs)
 
@@ -1006,10 +1267,10 @@ class Magento(APISession):
                                        none_on_empty=False,
                                        **kwargs) -> Sequence[Dict[str, str]]:
         """Get all options for a products attribute."""
-        response = self.get_json_api(f"/V1/products/attributes/{escape_path(attribute_code)}/options",
-                                     none_on_404=none_on_404,
-                                     none_on_empty=none_on_empty,
-                                     **kwargs)
+        response = self.get_cached_json_api(f"/V1/products/attributes/{escape_path(attribute_code)}/options",
+                                            none_on_404=none_on_404,
+                                            none_on_empty=none_on_empty,
+                                            **kwargs)
         return cast(Sequence[Dict[str, str]], response)
 
     def add_products_attribute_option(self, attribute_code: str, option: Dict[str, str], **kwargs) -> str:
@@ -1021,9 +1282,10 @@ class Magento(APISession):
         :param option: dict with label/value keys (mandatory)
         :return: new id
         """
+        path = f"/V1/products/attributes/{escape_path(attribute_code)}/options"
         payload = {"option": option}
-        response = self.post_json_api(f"/V1/products/attributes/{escape_path(attribute_code)}/options",
-                                      json=payload, **kwargs)
+        response = self.post_json_api(path, json=payload, **kwargs)
+        self._invalidate_cache(path)
         ret = cast(str, response)
 
         if ret.startswith("id_"):
@@ -1038,8 +1300,10 @@ class Magento(APISession):
         :param option_id:
         :return: boolean
         """
-        return self.delete_json_api(f"/V1/products/attributes/{escape_path(attribute_code)}/options/{option_id}",
-                                    **kwargs)
+        path = f"/V1/products/attributes/{escape_path(attribute_code)}/options"
+        ret = self.delete_json_api(f"{path}/{escape_path(option_id)}", **kwargs)
+        self._invalidate_cache(path)
+        return ret
 
     # Aliases
     # -------
@@ -1064,7 +1328,7 @@ class Magento(APISession):
 
     def ship_order(self, order_id: PathId, payload: MagentoEntity, **kwargs):
         """Ship an order."""
-        return self.post_api(f"/V1/order/{order_id}/ship", json=payload, **kwargs)
+        return self.post_api(f"/V1/order/{escape_path(order_id)}/ship", json=payload, **kwargs)
 
     def get_order_shipments(self, order_id: Union[int, str], **kwargs):
         """Get shipments for the given order id."""
@@ -1086,22 +1350,24 @@ class Magento(APISession):
         if store_codes is not None:
             params = {"storeCodes[]": store_codes}
 
-        return self.get_json_api("/V1/store/storeConfigs", params=params, **kwargs)
+        return self.get_cached_json_api("/V1/store/storeConfigs", params=params, **kwargs)
 
     def get_store_groups(self, **kwargs) -> Iterable[MagentoEntity]:
         """Get store groups."""
-        return self.get_json_api("/V1/store/storeGroups", **kwargs)
+        return self.get_cached_json_api("/V1/store/storeGroups", **kwargs)
 
     def get_store_views(self, **kwargs) -> Iterable[MagentoEntity]:
         """Get store views."""
-        return self.get_json_api("/V1/store/storeViews", **kwargs)
+        return self.get_cached_json_api("/V1/store/storeViews", **kwargs)
 
     def get_websites(self, **kwargs) -> Iterable[MagentoEntity]:
         """Get websites."""
-        return self.get_json_api("/V1/store/websites", **kwargs)
+        return self.get_cached_json_api("/V1/store/websites", **kwargs)
 
     def get_current_store_group_id(self, *, skip_store_groups=False, scope: Optional[str] = None, **kwargs) -> int:
         """Get the current store group id for the current scope. This is not part of Magento API.
+        If ``cache_ttl`` is set, the store groups, websites and store views are cached, so subsequent calls don't make
+        any request.
 
         :param skip_store_groups: if True, assume the current scope is not already a store group.
         :param scope: Override the client's scope
@@ -1161,12 +1427,17 @@ class Magento(APISession):
         """
         return self.get_json_api(f"/V1/inventory/sources/{escape_path(source_code)}", **kwargs)
 
-    def save_source(self, source: MagentoEntity, **kwargs):
+    def save_source(self, source: MagentoEntity, *, async_bulk=False, **kwargs):
         """Save a source.
 
         https://adobe-commerce.redoc.ly/2.4.6-admin/tag/inventorysources/#operation/PostV1InventorySources
+
+        :param source:
+        :param async_bulk: if True, use the async bulk API. The response is then the bulk operation, which contains
+            a ``bulk_uuid`` to use with ``get_bulk_status``, rather than the saved source.
         """
-        return self.post_json_api("/V1/inventory/sources", json={"source": source}, **kwargs)
+        return self.post_json_api("/V1/inventory/sources", json=_bulk_payload({"source": source}, async_bulk),
+                                  async_bulk=async_bulk, **kwargs)
 
     # Source Items
     # ============
@@ -1198,59 +1469,79 @@ class Magento(APISession):
 
         return self.get_paginated("/V1/inventory/source-items", query=query, limit=limit, **kwargs)
 
-    def save_source_items(self, source_items: Sequence[Union[SourceItem, SourceItemIn]], **kwargs):
+    def save_source_items(self, source_items: Sequence[Union[SourceItem, SourceItemIn]], *, async_bulk=False,
+                          **kwargs):
         """Save a sequence of source-items. Return None if the sequence is empty.
 
         :param source_items:
+        :param async_bulk: if True, use the async bulk API. The response is then the bulk operation, which contains
+            a ``bulk_uuid`` to use with ``get_bulk_status``.
         :return:
         """
         if not source_items:
             return None
-        return self.post_json_api("/V1/inventory/source-items", json={"sourceItems": source_items}, **kwargs)
+        payload = {"sourceItems": source_items}
+        return self.post_json_api("/V1/inventory/source-items", json=_bulk_payload(payload, async_bulk),
+                                  async_bulk=async_bulk, **kwargs)
 
-    def delete_source_items(self, source_items: Iterable[Union[SourceItem, SourceItemIn]], **kwargs):
+    def delete_source_items(self, source_items: Iterable[Union[SourceItem, SourceItemIn]], *, async_bulk=False,
+                            **kwargs):
         """Delete a sequence of source-items. Only the SKU and the source_code are used.
 
         Note: Magento returns an error if this is called with empty source_items.
 
         :param source_items:
+        :param async_bulk: if True, use the async bulk API. The response is then the bulk operation, which contains
+            a ``bulk_uuid`` to use with ``get_bulk_status``.
         :param kwargs: keyword arguments passed to the underlying POST call.
         """
         payload = {
             "sourceItems": [{"sku": s["sku"], "source_code": s["source_code"]} for s in source_items],
         }
-        return self.post_json_api("/V1/inventory/source-items-delete", json=payload, **kwargs)
+        return self.post_json_api("/V1/inventory/source-items-delete", json=_bulk_payload(payload, async_bulk),
+                                  async_bulk=async_bulk, **kwargs)
 
-    def delete_source_items_by_source_code(self, source_code: str, **kwargs):
+    def delete_source_items_by_source_code(self, source_code: str, *, batch_size: Optional[int] = None, **kwargs):
         """Delete all source items that have the given ``source_code``.
 
-        :return: requests.Response object if there are source items, None otherwise.
+        :param source_code:
+        :param batch_size: if set, delete the source items in batches of that size instead of a single request. This
+            avoids timeouts on sources with a lot of items.
+        :return: the response of the delete request if there are source items, None otherwise. If ``batch_size`` is
+            set, this is a list of the responses of all batches.
         """
-        source_items = list(self.get_source_items(source_code=source_code, **kwargs))
-        if source_items:
+        # All items must be retrieved before deleting any of them, otherwise the pagination would skip some.
+        # Only the fields used by delete_source_items are retrieved.
+        source_items = list(self.get_source_items(source_code=source_code, fields="sku,source_code", **kwargs))
+        if not source_items:
+            return None
+
+        if batch_size is None:
             return self.delete_source_items(source_items, **kwargs)
 
+        return [self.delete_source_items(batch, **kwargs) for batch in _chunks(source_items, batch_size)]
+
     # Taxes
     # =====
 
     def get_tax_classes(self, *, query: Query = None, limit=-1, **kwargs) -> Iterator[MagentoEntity]:
         """Get all tax classes (generator)."""
-        return self.get_paginated("/V1/taxClasses/search", query=query, limit=limit, **kwargs)
+        return self.get_cached_paginated("/V1/taxClasses/search", query=query, limit=limit, **kwargs)
 
     def get_tax_rates(self, *, query: Query = None, limit=-1, **kwargs) -> Iterator[MagentoEntity]:
         """Get all tax rates (generator)."""
-        return self.get_paginated("/V1/taxRates/search", query=query, limit=limit, **kwargs)
+        return self.get_cached_paginated("/V1/taxRates/search", query=query, limit=limit, **kwargs)
 
     def get_tax_rules(self, *, query: Query = None, limit=-1, **kwargs) -> Iterator[MagentoEntity]:
         """Get all tax rules (generator)."""
-        return self.get_paginated("/V1/taxRules/search", query=query, limit=limit, **kwargs)
+        return self.get_cached_paginated("/V1/taxRules/search", query=query, limit=limit, **kwargs)
 
     # Modules
     # =======
 
     def get_modules(self, query: Query = None, limit=-1, **kwargs) -> Iterator[MagentoEntity]:
         """Get all enabled modules (generator)."""
-        return self.get_paginated("/V1/modules", query=query, limit=limit, **kwargs)
+        return self.get_cached_paginated("/V1/modules", query=query, limit=limit, **kwargs)
 
     # Helpers
     # =======
@@ -1290,9 +1581,7 @@ class Magento(APISession):
 
     def sku_was_bought(self, sku: str, **kwargs):
         """Test if there exists at least one order with the given SKU."""
-        for _ in self.get_orders_items(sku=sku, limit=1, fields="sku", **kwargs):
-            return True
-        return False
+        return _first(self.get_orders_items(sku=sku, limit=1, fields="sku", **kwargs)) is not None
 
     def skus_were_bought(self, skus: List[str]):
         """Equivalent of ``sku_was_bought`` for multiple SKUs. Return a dict of {SKU -> bought?}.
@@ -1318,7 +1607,7 @@ class Magento(APISession):
                     throw=False,
                     retry=0,
                     scope: Optional[str] = None,
-                    fields: Optional[str] = None,
+                    fields: Union[str, Sequence[str], None] = None,
                     **kwargs):
         """Equivalent of .request() that prefixes the path with the base API URL.
 
@@ -1328,46 +1617,190 @@ class Magento(APISession):
         :param async_bulk: if True, use the "/async/bulk" prefix.
             https://devdocs.magento.com/guides/v2.3/rest/bulk-endpoints.html
         :param throw: if True, raise an exception if the response is an error
-        :param retry: if non-zero, retry the request that many times if there is an error, sleeping 10s between
-            each request.
+        :param retry: if non-zero, retry the request that many times if there is an error. The delay between retries
+            grows exponentially (see ``RETRY_DELAY``), unless the response has a ``Retry-After`` header in seconds
+            (capped at ``RETRY_MAX_DELAY``).
         :param scope: overrides the client's scope for this request
-        :param fields: overrides the `params["fields"]`
-        :param kwargs: keyword arguments passed to ``.request()``
+        :param fields: overrides the `params["fields"]`. This can be a string or a sequence of fields.
+        :param kwargs: keyword arguments passed to ``.request()``. If ``orjson`` is installed, the ``json`` argument is
+            serialized with it.
         :return:
         """
         assert path.startswith("/V1/")
 
-        full_path = "/rest"
-
         if scope is None:
             scope = self.scope
 
-        if scope != "default":
-            full_path += f"/{scope}"
-
-        if async_bulk:
-            full_path += "/async/bulk"
-
-        full_path += path
+        full_path = _rest_path_prefix(scope, async_bulk) + path
 
         if fields is not None:
-            kwargs.setdefault("params", {})
-            kwargs["params"]["fields"] = fields
+            kwargs["params"] = {**(kwargs.get("params") or {}), "fields": _join_fields(fields)}
+
+        if orjson is not None and kwargs.get("json") is not None and not kwargs.get("data"):
+            kwargs["data"] = _dumps_json(kwargs.pop("json"))
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), "Content-Type": "application/json"}
 
         if self.logger:
             self.logger.debug("%s %s" % (method, full_path))
         r = super().request_api(method, full_path, *args, throw=False, **kwargs)
+        attempt = 0
         while not r.ok and retry > 0:
             retry -= 1
-            time.sleep(10)
+            time.sleep(self._retry_delay(r, attempt))
+            attempt += 1
             r = super().request_api(method, full_path, *args, throw=False, **kwargs)
 
         if throw:
             raise_for_response(r)
         return r
 
+    def _retry_delay(self, response: requests.Response, attempt: int) -> float:
+        """Return the delay in seconds before retrying a request that failed with the given response."""
+        retry_after = response.headers.get("Retry-After")
+        if isinstance(retry_after, str) and retry_after.isdigit():
+            # Don't let a misconfigured server or proxy block the client for hours
+            return min(float(retry_after), self.RETRY_MAX_DELAY)
+
+        return min(self.RETRY_DELAY * 2 ** attempt, self.RETRY_MAX_DELAY) + random.uniform(0, self.RETRY_DELAY)
+
+    def get_json_api(self, path: str, params: Optional[dict] = None, *,
+                     throw=True,
+                     none_on_404: Optional[bool] = None,
+                     none_on_empty: Optional[bool] = None,
+                     **kwargs):
+        """Equivalent of ``.get_api()`` that parses a JSON response. Return ``None`` on 404s and throws on other errors.
+
+        This is the same as ``APISession.get_json_api``, except that the response is decoded with ``orjson`` if it's
+        installed.
+
+        :param path: URL path. This must start with "/V1/"
+        :param params: query params
+        :param throw: if True, throw an exception on error
+        :param none_on_404: if True, 404 errors are ignored and ``None`` is returned instead. This default on
+          the ``.none_on_404`` instance attribute.
+        :param none_on_empty: if True, successful responses that contain an empty body are treated as if they contained
+          the JSON string ``null``. This default on the ``.none_on_empty`` instance attribute.
+        :param kwargs: keyword arguments passed to ``.get_api()``
+        :return:
+        """
+        none_on_404 = none_on_404 is True or (none_on_404 is None and self.none_on_404)
+        none_on_empty = none_on_empty is True or (none_on_empty is None and self.none_on_empty)
+
+        r = self.get_api(path, params=params, throw=False if none_on_404 else throw, **kwargs)
+        if r.status_code == 404 and none_on_404:
+            return None
+        if throw:
+            self.raise_for_response(r)
+
+        if none_on_empty and not r.content:
+            return None
+
+        return _response_json(r)
+
+    def post_json_api(self, path: str, *args, throw=True, **kwargs):
+        """Equivalent of ``.post_api()`` that parses a JSON response."""
+        return _response_json(self.post_api(path, *args, throw=throw, **kwargs))
+
+    def put_json_api(self, path: str, *args, throw=True, **kwargs):
+        """Equivalent of ``.put_api()`` that parses a JSON response."""
+        return _response_json(self.put_api(path, *args, throw=throw, **kwargs))
+
+    def patch_json_api(self, path: str, *args, throw=True, **kwargs):
+        """Equivalent of ``.patch_api()`` that parses a JSON response."""
+        return _response_json(self.patch_api(path, *args, throw=throw, **kwargs))
+
+    def delete_json_api(self, path: str, throw=True, **kwargs):
+        """Equivalent of ``.delete_api()`` that parses a JSON response."""
+        return _response_json(self.delete_api(path, throw=throw, **kwargs))
+
+    def get_cached_json_api(self, path: str, params: Optional[dict] = None, **kwargs):
+        """Equivalent of ``get_json_api`` that caches the responses for ``cache_ttl`` seconds.
+        If ``cache_ttl`` is not set, this is the same as ``get_json_api``.
+
+        Each call returns a copy of the cached response, so it can be modified without altering the cache.
+
+        :param path: URL path. This must start with "/V1/"
+        :param params: query params
+        :param kwargs: keyword arguments passed to ``get_json_api``. They are part of the cache key.
+        :return:
+        """
+        if self.cache_ttl is None:
+            return self.get_json_api(path, params, **kwargs)
+
+        key = self._cache_key(path, (params or {}).items(), kwargs.items())
+        return self._get_cached(key, lambda: self.get_json_api(path, params, **kwargs))
+
+    def get_cached_paginated(self, path: str, **kwargs) -> Iterator[MagentoEntity]:
+        """Equivalent of ``get_paginated`` that caches all the items for ``cache_ttl`` seconds.
+        If ``cache_ttl`` is not set, this is the same as ``get_paginated``. Otherwise, all the pages are fetched before
+        the first item is returned.
+
+        :param path: URL path. This must start with "/V1/"
+        :param kwargs: keyword arguments passed to ``get_paginated``. They are part of the cache key.
+        :return:
+        """
+        if self.cache_ttl is None:
+            return self.get_paginated(path, **kwargs)
+
+        key = self._cache_key(path, (), kwargs.items())
+        return iter(self._get_cached(key, lambda: list(self.get_paginated(path, **kwargs))))
+
+    def _cache_key(self, path: str, params: Iterable[Tuple[str, Any]], kwargs: Iterable[Tuple[str, Any]]):
+        # The base URL is part of the key so that a persistent cache can be shared between Magento instances.
+        return f"{path} {self.base_url} {self.scope} {sorted(params)!r} {sorted(kwargs)!r}"
+
+    def _get_cached(self, key: str, fetch: Callable[[], Any]):
+        assert self.cache_ttl is not None
+        now = time.time()
+        cached = self._cache.get(key)
+        if cached is not None and now - cached[0] < self.cache_ttl:
+            value = cached[1]
+        else:
+            value = fetch()
+            self._cache[key] = (now, value)
+
+        # Return a copy so that callers can't modify the cached value, like they can't with a persistent cache
+        return copy.deepcopy(value)
+
+    def clear_cache(self):
+        """Clear the cache of ``get_cached_json_api`` and ``get_cached_paginated``.
+        Note this clears the whole ``cache`` mapping if one was given to the constructor.
+        """
+        self._cache.clear()
+
+    def _invalidate_cache(self, path: str):
+        """Remove the cached responses of ``get_cached_json_api`` or ``get_cached_paginated`` for the given path."""
+        prefix = f"{path} "
+        for key in [key for key in self._cache if key.startswith(prefix)]:
+            del self._cache[key]
+
+    def get_first_by_field(self, path: str, field: str, value, *, retry=0,
+                           fields: Union[str, Sequence[str], None] = None,
+                           **kwargs) -> Optional[MagentoEntity]:
+        """Get the first item of a paginated API path whose ``field`` is equal to ``value``, or ``None`` if there is no
+        such item. This is equivalent to ``next(get_paginated(path, query=..., limit=1), None)``, but without the
+        pagination logic.
+
+        :param path:
+        :param field:
+        :param value:
+        :param retry:
+        :param fields: fields to retrieve for the item, as a string or a sequence. Don't wrap them in `items[]`.
+        :return:
+        """
+        query = make_field_value_query(field, value, page_size=1, current_page=1)
+        res = self.get_json_api(path, query,
+                                none_on_404=False,
+                                none_on_empty=False,
+                                retry=retry,
+                                fields=_items_fields(fields),
+                                **kwargs)
+        items: Optional[list] = res.get("items")
+        return items[0] if items else None
+
     def get_paginated(self, path: str, *, query: Query = None, limit=-1, retry=0, page_size: Optional[int] = None,
-                      fields: Optional[dict] = None,
+                      fields: Union[str, Sequence[str], None] = None,
+                      max_workers=1,
                       **kwargs):
         """Get a paginated API path.
 
@@ -1376,7 +1809,10 @@ class Magento(APISession):
         :param limit: -1 for no limit
         :param retry:
         :param page_size: default is `self.PAGE_SIZE`
-        :param fields: fields to retrieve for each item. Don't wrap them in `items[]`
+        :param fields: fields to retrieve for each item, as a string or a sequence. Don't wrap them in `items[]`.
+            Retrieving only the needed fields largely reduces the size of the responses.
+        :param max_workers: if greater than 1, fetch up to that many pages concurrently once the first page is
+            retrieved. Items are still yielded in order. Use ``pool_maxsize`` to keep as many connections alive.
         :return:
         """
         if limit == 0:
@@ -1388,38 +1824,48 @@ class Magento(APISession):
         if 0 < limit < page_size:
             page_size = limit
 
-        if query is not None:
-            query = query.copy()
-        else:
-            query = {}
+        base_query: Dict[str, Any] = query.copy() if query is not None else {}
+        base_query["searchCriteria[pageSize]"] = page_size
 
-        query["searchCriteria[pageSize]"] = page_size
+        fields = _items_fields(fields)
 
-        if isinstance(fields, str):
-            fields = f"items[{fields}],total_count"
+        def get_page(current_page: int) -> JSONDict:
+            # Pages are fetched one after the other unless max_workers > 1, so the query can be updated in place
+            page_query = base_query.copy() if max_workers > 1 else base_query
+            page_query["searchCriteria[currentPage]"] = current_page
 
-        current_page = 1
-        count = 0
+            return self.get_json_api(path, page_query,
+                                     none_on_404=False,
+                                     none_on_empty=False,
+                                     retry=retry,
+                                     fields=fields,
+                                     **kwargs)
 
-        while True:
-            page_query = query.copy()
-            page_query["searchCriteria[currentPage]"] = current_page
+        pages: Iterator[JSONDict]
+        if max_workers > 1:
+            pages = _get_pages_concurrently(get_page, max_workers=max_workers, page_size=page_size, limit=limit)
+        else:
+            pages = _get_pages(get_page, page_size=page_size, limit=limit)
 
-            res = self.get_json_api(path, page_query,
-                                    none_on_404=False,
-                                    none_on_empty=False,
-                                    retry=retry,
-                                    fields=fields,
-                                    **kwargs)
-            items: list = res.get("items", [])
-            if not items:
+        count = 0
+        # Log every 1000 items; -1 is never reached if there's no logger
+        next_log_count = 1000 if self.logger else -1
+
+        previous_items: Optional[list] = None
+        for res in pages:
+            items: Optional[list] = res.get("items")
+            # Magento returns the last page again for pages past the end. This happens if the first page was shorter
+            # than page_size because total_count is larger than the actual number of items.
+            if not items or items == previous_items:
                 break
+            previous_items = items
 
             total_count: int = res["total_count"]
 
             for item in items:
-                if self.logger and count and count % 1000 == 0:
+                if count == next_log_count and self.logger:
                     self.logger.debug(f"loaded {count} items")
+                    next_log_count += 1000
                 yield item
                 count += 1
                 if count >= total_count:
@@ -1427,5 +1873,3 @@ class Magento(APISession):
 
                 if count >= limit > 0:
                     return
-
-            current_page += 1
@@ -1,10 +1,16 @@
+import datetime
 import json
+import shelve
+import threading
 from collections import ChainMap
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from typing import Dict
 from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
 import pytest
 import requests
+from api_session import APISession
 from pytest_mock import MockerFixture
 
 import magento
@@ -12,6 +18,11 @@ from magento import client
 # noinspection PyProtectedMember
 from magento.client import raise_for_response, Magento
 
+try:
+    import orjson
+except ImportError:  # pragma: nocover
+    orjson = None
+
 
 class TemporaryEnv:
     def __enter__(self):
@@ -28,6 +39,7 @@ class TemporaryEnv:
 def fake_response(status_code, text):
     return mock.Mock(**{
         "json.return_value": json.loads(text),
+        "content": text.encode(),
         "text.return_value": text,
         "status_code": status_code,
         "ok": 200 <= status_code < 300,
@@ -63,6 +75,25 @@ class DummyMagento(magento.Magento):
         raise MockError()
 
 
+# Responses of the store endpoints for a Magento instance with two store groups:
+# "base" website -> "main" group (root category 2); "other" group (root category 3) -> "fr" store view
+STORE_RESPONSES = {
+    "/V1/store/storeGroups": [{"id": 1, "code": "main", "root_category_id": 2},
+                              {"id": 2, "code": "other", "root_category_id": 3}],
+    "/V1/store/websites": [{"id": 1, "code": "base", "default_group_id": 1}],
+    "/V1/store/storeViews": [{"id": 1, "code": "fr", "store_group_id": 2}],
+}
+
+
+def make_client(base_url="https://example.com", **kwargs) -> Magento:
+    return Magento(token="123", base_url=base_url, **kwargs)
+
+
+@pytest.fixture()
+def magento_client():
+    return make_client()
+
+
 def test_url(mocker: MockerFixture):
     mocker.patch('magento.Magento', DummyMagento)
     m = magento.Magento(base_url="http://test", token="secret", scope="toto")
@@ -79,6 +110,20 @@ def test_raise_for_response():
     # Should not raise
     raise_for_response(response)
 
+    response.status_code = 400
+    response._content = b'{"message": "%fieldName is a required field.", "parameters": {"fieldName": "product"}}'
+    with pytest.raises(magento.MagentoException, match="product is a required field"):
+        raise_for_response(response)
+
+    response._content = b'{ not JSON'
+    with pytest.raises(requests.HTTPError):
+        raise_for_response(response)
+
+    response.status_code = 500
+    response._content = b'<html><body>Internal Server Error</body></html>'
+    with pytest.raises(requests.HTTPError):
+        raise_for_response(response)
+
 
 def test_client_env():
     with pytest.raises(RuntimeError):
@@ -110,3 +155,533 @@ def test_client_env():
         user_agent = "hello I'm a test"
         environ["PYMAGENTO_USER_AGENT"] = user_agent
         assert Magento().headers.get("user-agent") == user_agent
+
+
+def test_client_context_manager():
+    with make_client() as m:
+        assert isinstance(m, requests.Session)
+
+
+def test_client_pool_maxsize():
+    m = make_client(pool_maxsize=32)
+    assert m.get_adapter("https://example.com")._pool_maxsize == 32  # type: ignore[attr-defined]
+    assert m.get_adapter("http://example.com")._pool_maxsize == 32  # type: ignore[attr-defined]
+
+
+@pytest.mark.parametrize("value,expected", [
+    (42, "42"),
+    (0, "0"),
+    ("SKU123", "SKU123"),
+    ("SKU-123", "SKU-123"),
+    ("MY SKU", "MY%20SKU"),
+    ("a/b", "a%2Fb"),
+    ("épée", "%C3%A9p%C3%A9e"),
+    (["a"], "%5B%27a%27%5D"),
+])
+def test_escape_path(value, expected):
+    assert client.escape_path(value) == expected
+
+
+def test_escape_path_cache():
+    client._cached_escape_path.cache_clear()
+    assert client.escape_path("a/b") == "a%2Fb"
+    assert client.escape_path("a/b") == "a%2Fb"
+    assert client._cached_escape_path.cache_info().hits == 1
+
+    assert client.escape_path("a/b", safe="/") == "a/b"
+    assert client._cached_escape_path.cache_info().misses == 2
+
+
+@pytest.mark.parametrize("use_orjson", [False, True])
+def test_loads_json(mocker: MockerFixture, use_orjson):
+    if use_orjson and orjson is None:  # pragma: nocover
+        pytest.skip("orjson is not installed")
+    mocker.patch.object(client, "orjson", orjson if use_orjson else None)
+
+    assert client._loads_json(b'{"sku": "S\\u00e9", "qty": 3}') == {"sku": "Sé", "qty": 3}
+    assert client._loads_json('[1, "é"]'.encode()) == [1, "é"]
+
+
+@pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+def test_dumps_json():
+    # These are the documented differences with json.dumps
+    assert client._dumps_json({1: datetime.date(2024, 1, 2), "price": float("nan")}) == \
+           b'{"1":"2024-01-02","price":null}'
+    with pytest.raises(TypeError):
+        client._dumps_json(2 ** 64)
+
+
+def test_json_api_invalid_json(mocker: MockerFixture, magento_client: Magento):
+    mocker.patch.object(APISession, "request_api", return_value=mock.Mock(ok=True, content=b"<html></html>"))
+
+    with pytest.raises(requests.exceptions.JSONDecodeError):
+        magento_client.post_json_api("/V1/test", json={})
+    with pytest.raises(requests.RequestException):
+        magento_client.get_json_api("/V1/test")
+
+
+def test_delete_special_prices_by_sku(mocker: MockerFixture, magento_client: Magento):
+    get_special_prices = mocker.patch.object(magento_client, "get_special_prices",
+                                             side_effect=lambda skus, **kwargs: [{"sku": sku} for sku in skus
+                                                                                 if sku != "C"])
+    delete_special_prices = mocker.patch.object(magento_client, "delete_special_prices",
+                                                side_effect=lambda prices, **kwargs: [{"sku": prices[0]["sku"]}])
+
+    errors = magento_client.delete_special_prices_by_sku(iter("ABCDE"), batch_size=2)
+    assert errors == [{"sku": "A"}, {"sku": "D"}, {"sku": "E"}]
+    assert [c.args[0] for c in get_special_prices.call_args_list] == [["A", "B"], ["C", "D"], ["E"]]
+    assert delete_special_prices.call_count == 3
+
+    get_special_prices.reset_mock()
+    delete_special_prices.reset_mock()
+    assert magento_client.delete_special_prices_by_sku(["C"]) == []
+    delete_special_prices.assert_not_called()
+
+
+def test_get_product_by_query(mocker: MockerFixture, magento_client: Magento):
+    query = magento.make_field_value_query("name", "test")
+
+    mocker.patch.object(magento_client, "get_products", return_value=iter([]))
+    assert magento_client.get_product_by_query(query) is None
+
+    mocker.patch.object(magento_client, "get_products", return_value=iter([{"sku": "A"}]))
+    assert magento_client.get_product_by_query(query) == {"sku": "A"}
+
+    mocker.patch.object(magento_client, "get_products", return_value=iter([{"sku": "A"}, {"sku": "B"}]))
+    with pytest.raises(magento.MagentoAssertionError):
+        magento_client.get_product_by_query(query)
+
+
+def test_get_prices(mocker: MockerFixture, magento_client: Magento):
+    base_prices = [{"sku": "A", "price": 3.14, "store_id": 0}]
+    special_prices = [{"sku": "A", "price": 2.99, "store_id": 0}]
+    get_base_prices = mocker.patch.object(magento_client, "get_base_prices", return_value=base_prices)
+    get_special_prices = mocker.patch.object(magento_client, "get_special_prices", return_value=special_prices)
+
+    assert magento_client.get_prices(["A"], store_id=0) == (base_prices, special_prices)
+    get_base_prices.assert_called_once_with(["A"], store_id=0)
+    get_special_prices.assert_called_once_with(["A"], store_id=0)
+
+
+def test_async_set_order_statuses(mocker: MockerFixture, magento_client: Magento):
+    post_json_api = mocker.patch.object(magento_client, "post_json_api", return_value={"bulk_uuid": "abc"})
+
+    orders = [
+        {"entity_id": 1, "increment_id": "1001", "status": "pending"},
+        {"entity_id": 2, "increment_id": "1002", "status": "pending"},
+    ]
+    statuses = [(orders[0], "processing"), (orders[1], "complete")]
+    assert magento_client.async_set_order_statuses(statuses) == {"bulk_uuid": "abc"}
+    post_json_api.assert_called_once_with("/V1/orders", json=[
+        {"entity": {"entity_id": 1, "increment_id": "1001", "status": "processing"}},
+        {"entity": {"entity_id": 2, "increment_id": "1002", "status": "complete"}},
+    ], async_bulk=True)
+
+    post_json_api.reset_mock()
+    magento_client.async_hold_orders([1, 2])
+    post_json_api.assert_called_once_with("/V1/orders/byId/hold", json=[{"id": 1}, {"id": 2}], async_bulk=True)
+
+
+def test_get_first_by_field(mocker: MockerFixture, magento_client: Magento):
+    get_json_api = mocker.patch.object(magento_client, "get_json_api",
+                                       return_value={"items": [{"increment_id": "1001"}], "total_count": 1})
+
+    assert magento_client.get_order_by_increment_id("1001", fields="increment_id") == {"increment_id": "1001"}
+    get_json_api.assert_called_once_with("/V1/orders", {
+        "searchCriteria[filter_groups][0][filters][0][field]": "increment_id",
+        "searchCriteria[filter_groups][0][filters][0][value]": "1001",
+        "searchCriteria[pageSize]": 1,
+        "searchCriteria[currentPage]": 1,
+    }, none_on_404=False, none_on_empty=False, retry=0, fields="items[increment_id],total_count")
+
+    get_json_api.return_value = {"items": [], "total_count": 0}
+    assert magento_client.get_invoice_by_increment_id("1001") is None
+    assert magento_client.get_product_by_id(42) is None
+
+
+def test_get_last_orders_page_size(mocker: MockerFixture, magento_client: Magento):
+    orders = [{"increment_id": str(n)} for n in range(1010, 1000, -1)]
+    get_json_api = mocker.patch.object(magento_client, "get_json_api",
+                                       return_value={"items": orders, "total_count": 2000})
+
+    assert magento_client.get_last_orders() == orders
+    get_json_api.assert_called_once()
+    query = get_json_api.call_args.args[1]
+    assert query["searchCriteria[pageSize]"] == 10
+    assert query["searchCriteria[sortOrders][0][field]"] == "increment_id"
+
+
+def test_get_cached_json_api(mocker: MockerFixture):
+    m = make_client(cache_ttl=60)
+    get_json_api = mocker.patch.object(m, "get_json_api", side_effect=lambda path, params, **kwargs: [path])
+    time_ = mocker.patch("magento.client.time.time", return_value=1000)
+
+    assert m.get_products_types() == ["/V1/product/types"]
+    assert m.get_products_types() == ["/V1/product/types"]
+    assert get_json_api.call_count == 1
+
+    assert m.get_attribute_set_attributes(4) == ["/V1/products/attribute-sets/4/attributes"]
+    assert m.get_products_types(scope="default") == ["/V1/product/types"]
+    assert get_json_api.call_count == 3
+
+    time_.return_value = 1060
+    m.get_products_types()
+    assert get_json_api.call_count == 4
+
+    m.clear_cache()
+    m.get_products_types()
+    assert get_json_api.call_count == 5
+
+
+def test_cached_values_are_copied(mocker: MockerFixture):
+    m = make_client(cache_ttl=60)
+    mocker.patch.object(m, "get_json_api", return_value={"items": [{"id": 1, "rate": 20}], "total_count": 1})
+
+    rate = next(m.get_tax_rates())
+    rate["rate"] = 5
+    assert list(m.get_tax_rates()) == [{"id": 1, "rate": 20}]
+
+
+def test_get_cached_json_api_without_ttl(mocker: MockerFixture, magento_client: Magento):
+    get_json_api = mocker.patch.object(magento_client, "get_json_api", return_value=[])
+
+    magento_client.get_products_types()
+    magento_client.get_products_types()
+    assert get_json_api.call_count == 2
+
+
+def test_persistent_cache(mocker: MockerFixture, tmp_path):
+    with shelve.open(str(tmp_path / "cache")) as cache:
+        m = make_client(cache_ttl=60, cache=cache)
+        get_json_api = mocker.patch.object(m, "get_json_api",
+                                           return_value={"items": [{"id": 3}], "total_count": 1})
+        assert list(m.get_tax_classes()) == [{"id": 3}]
+        assert list(m.get_tax_classes()) == [{"id": 3}]
+        assert get_json_api.call_count == 1
+
+    with shelve.open(str(tmp_path / "cache")) as cache:
+        m = make_client(cache_ttl=60, cache=cache)
+        get_json_api = mocker.patch.object(m, "get_json_api", return_value=[])
+        assert list(m.get_tax_classes()) == [{"id": 3}]
+        m.get_store_configs()
+        m.get_store_configs()
+        get_json_api.assert_called_once()
+
+        other = make_client("https://other.example.com", cache_ttl=60, cache=cache)
+        mocker.patch.object(other, "get_json_api", return_value={"items": [], "total_count": 0})
+        assert list(other.get_tax_classes()) == []
+
+
+def test_request_api_json_payload(mocker: MockerFixture, magento_client: Magento):
+    request = mocker.patch.object(APISession, "request_api", return_value=mock.Mock(ok=True))
+    payload = {"prices": [{"sku": "A", "price": 3.14, "store_id": 0}]}
+
+    mocker.patch.object(client, "orjson", None)
+    magento_client.post_api("/V1/products/base-prices", json=payload)
+    assert request.call_args.kwargs["json"] == payload
+
+    if orjson is None:  # pragma: nocover
+        return
+
+    mocker.patch.object(client, "orjson", orjson)
+    magento_client.post_api("/V1/products/base-prices", json=payload, headers={"X-Test": "1"})
+    kwargs = request.call_args.kwargs
+    assert "json" not in kwargs
+    assert json.loads(kwargs["data"]) == payload
+    assert kwargs["headers"] == {"X-Test": "1", "Content-Type": "application/json"}
+
+
+def test_fields(mocker: MockerFixture):
+    m = make_client(scope="default")
+    request = mocker.patch.object(APISession, "request_api",
+                                  return_value=mock.Mock(ok=True, status_code=200, content=b'{"id": 1}'))
+
+    assert m.sku_exists("A")
+    assert request.call_args.kwargs["params"] == {"fields": "id"}
+
+    request.return_value.content = b'{"items": [{"sku": "A", "name": "Abc"}], "total_count": 1}'
+    assert list(m.get_products(fields=["sku", "name"])) == [{"sku": "A", "name": "Abc"}]
+    assert request.call_args.args[:2] == ("get", "/rest/V1/products/")
+    assert request.call_args.kwargs["params"] == {
+        "searchCriteria[pageSize]": Magento.PAGE_SIZE,
+        "searchCriteria[currentPage]": 1,
+        "fields": "items[sku,name],total_count",
+    }
+
+
+def test_first():
+    closed = []
+
+    def gen():
+        try:
+            yield 1
+            yield 2
+        finally:
+            closed.append(True)
+
+    assert client._first(gen()) == 1
+    assert closed == [True]
+    assert client._first([]) is None
+    assert client._first(iter([3])) == 3
+
+
+def test_cached_products_attribute_options(mocker: MockerFixture):
+    m = make_client(cache_ttl=300)
+    get_json_api = mocker.patch.object(m, "get_json_api", return_value=[{"label": "Acme", "value": "12"}])
+    post_json_api = mocker.patch.object(m, "post_json_api", return_value="id_13")
+
+    assert m.get_manufacturers() == [{"label": "Acme", "value": "12"}]
+    m.get_manufacturers()
+    m.get_products_types()
+    assert get_json_api.call_count == 2
+
+    assert m.add_products_attribute_option("manufacturer", {"label": "Foo", "value": ""}) == "13"
+    post_json_api.assert_called_once()
+    m.get_manufacturers()
+    m.get_products_types()
+    assert get_json_api.call_count == 3
+
+
+def test_cached_attribute_set_attributes(mocker: MockerFixture):
+    m = make_client(cache_ttl=300)
+    get_json_api = mocker.patch.object(m, "get_json_api", return_value=[{"attribute_code": "color"}])
+    mocker.patch.object(m, "post_json_api", return_value=42)
+    mocker.patch.object(m, "delete_json_api", return_value=True)
+
+    m.get_attribute_set_attributes(4)
+    m.get_attribute_set_attributes(4)
+    m.get_attribute_set_attributes(5)
+    assert get_json_api.call_count == 2
+
+    assert m.assign_attribute_set_attribute(4, 7, "size") == 42
+    m.get_attribute_set_attributes(4)
+    m.get_attribute_set_attributes(5)
+    assert get_json_api.call_count == 3
+
+    assert m.remove_attribute_set_attribute(5, "size")
+    m.get_attribute_set_attributes(4)
+    m.get_attribute_set_attributes(5)
+    assert get_json_api.call_count == 4
+
+
+def test_save_product_log_response(mocker: MockerFixture):
+    logger = mock.Mock(**{"isEnabledFor.return_value": False})
+    m = make_client(logger=logger)
+    response = mock.Mock(ok=True, content=b'{"sku": "A"}')
+    mocker.patch.object(APISession, "request_api", return_value=response)
+
+    assert m.save_product({"sku": "A"}) == {"sku": "A"}
+    assert not any(c.args[0].startswith("Save product response") for c in logger.debug.call_args_list)
+
+    logger.isEnabledFor.return_value = True
+    response.text = '{"sku": "A"}'
+    m.save_product({"sku": "A"})
+    logger.debug.assert_called_with("Save product response: %s", '{"sku": "A"}')
+
+
+def test_path_ids_are_escaped(mocker: MockerFixture, magento_client: Magento):
+    get_json_api = mocker.patch.object(magento_client, "get_json_api")
+
+    magento_client.get_product_media("A/B", 12)
+    assert get_json_api.call_args.args[0] == "/V1/products/A%2FB/media/12"
+
+    magento_client.get_category("1/2")
+    assert get_json_api.call_args.args[0] == "/V1/categories/1%2F2"
+
+
+def test_cached_root_category_id(mocker: MockerFixture):
+    m = make_client(scope="fr", cache_ttl=60)
+    get_json_api = mocker.patch.object(m, "get_json_api",
+                                       side_effect=lambda path, params, **kwargs: STORE_RESPONSES[path])
+
+    assert m.get_root_category_id() == 3
+    assert get_json_api.call_count == 3
+    assert m.get_root_category_id() == 3
+    assert m.get_current_store_group_id() == 2
+    assert get_json_api.call_count == 3
+
+
+def test_get_paginated_reuses_connection():
+    client_ports = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            client_ports.add(self.client_address[1])
+            page = int(parse_qs(urlparse(self.path).query)["searchCriteria[currentPage]"][0])
+            body = json.dumps({"items": [{"id": page}], "total_count": 3}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    try:
+        with make_client(f"http://127.0.0.1:{server.server_port}", batch_page_size=1) as m:
+            assert [item["id"] for item in m.get_paginated("/V1/test")] == [1, 2, 3]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert len(client_ports) == 1
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_get_paginated_max_workers(mocker: MockerFixture, max_workers):
+    m = make_client(batch_page_size=2)
+    total_count = 9
+
+    requested_pages = []
+
+    def get_json_api(path, query, **kwargs):
+        page = query["searchCriteria[currentPage]"]
+        requested_pages.append(page)
+        start = (page - 1) * 2
+        return {"items": list(range(start, min(start + 2, total_count))), "total_count": total_count}
+
+    mocker.patch.object(m, "get_json_api", side_effect=get_json_api)
+
+    assert list(m.get_paginated("/V1/test", max_workers=max_workers)) == list(range(total_count))
+    assert sorted(requested_pages) == [1, 2, 3, 4, 5]
+
+    requested_pages.clear()
+    assert list(m.get_paginated("/V1/test", limit=5, max_workers=max_workers)) == list(range(5))
+    assert sorted(requested_pages) == [1, 2, 3]
+
+
+def test_save_source_items_async_bulk(mocker: MockerFixture, magento_client: Magento):
+    post_json_api = mocker.patch.object(magento_client, "post_json_api", return_value={"bulk_uuid": "abc"})
+    source_items = [{"sku": "A", "source_code": "default", "quantity": 3, "status": 1}]
+
+    magento_client.save_source_items(source_items)
+    post_json_api.assert_called_once_with("/V1/inventory/source-items", json={"sourceItems": source_items},
+                                          async_bulk=False)
+
+    post_json_api.reset_mock()
+    assert magento_client.save_source_items(source_items, async_bulk=True) == {"bulk_uuid": "abc"}
+    post_json_api.assert_called_once_with("/V1/inventory/source-items", json=[{"sourceItems": source_items}],
+                                          async_bulk=True)
+
+
+@pytest.mark.parametrize("method", ["post", "put", "patch", "delete"])
+def test_json_api_methods(mocker: MockerFixture, method, magento_client: Magento):
+    request = mocker.patch.object(APISession, "request_api", return_value=mock.Mock(ok=True, content=b'{"ok": true}'))
+
+    assert getattr(magento_client, f"{method}_json_api")("/V1/test") == {"ok": True}
+    assert request.call_args.args[:2] == (method, "/rest/all/V1/test")
+
+
+def test_delete_source_items_by_source_code(mocker: MockerFixture, magento_client: Magento):
+    source_items = [{"sku": sku, "source_code": "default"} for sku in "ABCDE"]
+    get_source_items = mocker.patch.object(magento_client, "get_source_items", return_value=iter(source_items))
+    delete_source_items = mocker.patch.object(magento_client, "delete_source_items",
+                                              side_effect=lambda items, **kwargs: len(items))
+
+    assert magento_client.delete_source_items_by_source_code("default", batch_size=2) == [2, 2, 1]
+    get_source_items.assert_called_once_with(source_code="default", fields="sku,source_code")
+    assert delete_source_items.call_count == 3
+
+    get_source_items.return_value = iter(source_items)
+    assert magento_client.delete_source_items_by_source_code("default") == 5
+
+    get_source_items.return_value = iter([])
+    assert magento_client.delete_source_items_by_source_code("default") is None
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_get_paginated_stops_at_last_page(mocker: MockerFixture, max_workers):
+    m = make_client(batch_page_size=2)
+    # total_count is off and Magento returns the last page again for pages past the end
+    pages = {1: [0, 1], 2: [2]}
+
+    def get_json_api(path, query, **kwargs):
+        page = min(query["searchCriteria[currentPage]"], 2)
+        return {"items": pages[page], "total_count": 4}
+
+    get_json_api_mock = mocker.patch.object(m, "get_json_api", side_effect=get_json_api)
+
+    assert list(m.get_paginated("/V1/test", max_workers=max_workers)) == [0, 1, 2]
+    assert get_json_api_mock.call_count == 2
+
+    # total_count is off and the first page is shorter than the page size
+    m = make_client(batch_page_size=1000)
+    get_json_api_mock = mocker.patch.object(m, "get_json_api",
+                                            return_value={"items": ["a", "b", "c"], "total_count": 5})
+
+    assert list(m.get_paginated("/V1/test", max_workers=max_workers)) == ["a", "b", "c"]
+    assert get_json_api_mock.call_count == 2
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_get_paginated_capped_page_size(mocker: MockerFixture, max_workers):
+    m = make_client(batch_page_size=2)
+
+    # The server returns fewer items per page than requested
+    def get_json_api(path, query, **kwargs):
+        page = query["searchCriteria[currentPage]"]
+        return {"items": [page], "total_count": 5}
+
+    mocker.patch.object(m, "get_json_api", side_effect=get_json_api)
+
+    assert list(m.get_paginated("/V1/test", max_workers=max_workers)) == [1, 2, 3, 4, 5]
+
+
+def test_get_paginated_logs(mocker: MockerFixture):
+    logger = mock.Mock()
+    m = make_client(logger=logger, batch_page_size=1000)
+    mocker.patch.object(m, "get_json_api", side_effect=lambda path, query, **kwargs: {
+        "items": [query["searchCriteria[currentPage]"]] * 1000,
+        "total_count": 2500,
+    })
+
+    assert len(list(m.get_paginated("/V1/test"))) == 2500
+    assert [c.args[0] for c in logger.debug.call_args_list] == ["loaded 1000 items", "loaded 2000 items"]
+
+
+def test_request_api_retry(mocker: MockerFixture, magento_client: Magento):
+    error = mock.Mock(ok=False, headers={})
+    rate_limited = mock.Mock(ok=False, headers={"Retry-After": "7"})
+    success = mock.Mock(ok=True)
+    request = mocker.patch.object(APISession, "request_api", side_effect=[error, error, rate_limited, error, success])
+    sleep = mocker.patch("magento.client.time.sleep")
+    mocker.patch("magento.client.random.uniform", return_value=0.5)
+
+    assert magento_client.request_api("get", "/V1/test", retry=5) is success
+    assert request.call_count == 5
+    assert [c.args[0] for c in sleep.call_args_list] == [1.5, 2.5, 7.0, 8.5]
+
+    request.side_effect = [error, error]
+    assert magento_client.request_api("get", "/V1/test", retry=1) is error
+
+    sleep.reset_mock()
+    request.side_effect = [mock.Mock(ok=False, headers={"Retry-After": "3600"}), success]
+    assert magento_client.request_api("get", "/V1/test", retry=1) is success
+    sleep.assert_called_once_with(magento_client.RETRY_MAX_DELAY)
+
+
+def test_rest_path_prefix():
+    assert client._rest_path_prefix("all", False) == "/rest/all"
+    assert client._rest_path_prefix("all", True) == "/rest/all/async/bulk"
+    assert client._rest_path_prefix("default", False) == "/rest"
+    assert client._rest_path_prefix("default", True) == "/rest/async/bulk"
+
+
+@pytest.mark.parametrize("scope,root_category_id,paths", [
+    ("main", 2, ["/V1/store/storeGroups"]),
+    ("base", 2, ["/V1/store/storeGroups", "/V1/store/websites"]),
+    ("fr", 3, ["/V1/store/storeGroups", "/V1/store/websites", "/V1/store/storeViews"]),
+])
+def test_get_root_category_id_requests(mocker: MockerFixture, scope, root_category_id, paths):
+    m = make_client(scope=scope)
+    get_json_api = mocker.patch.object(m, "get_json_api",
+                                       side_effect=lambda path, params, **kwargs: STORE_RESPONSES[path])
+
+    assert m.get_root_category_id() == root_category_id
+    assert [c.args[0] for c in get_json_api.call_args_list] == paths